@@ -5,20 +5,20 @@ import numpy as np
 from PIL import Image
 from config import CONFIG
 from face_processor import FaceProcessor
-from database_handler import DatabaseManager
+from db_service import connect_database
 from employee_registrar import EmployeeRegistrar
 import datetime
 
 class AdminApp:
     def __init__(self):
         self.face_processor = FaceProcessor()
-        self.db = DatabaseManager()
+        self.db = connect_database()
         self.employee_registrar = EmployeeRegistrar()
 
     def run(self):
         st.title("Employee Management System - Admin Panel")
 
-        menu = ["View Employees", "Register Employee", "Delete Employee", "View Logs", "Manage Logs", "Manual Log Entry"]
+        menu = ["View Employees", "Register Employee", "Delete Employee", "View Logs", "Manage Logs", "Manual Log Entry", "Attendance Reports"]
         choice = st.sidebar.selectbox("Menu", menu)
 
         if choice == "View Employees":
@@ -33,6 +33,8 @@ class AdminApp:
             self.manage_logs()
         elif choice == "Manual Log Entry":
             self.manual_log_entry()
+        elif choice == "Attendance Reports":
+            self.attendance_reports()
 
     def view_employees(self):
         st.header("Registered Employees")
@@ -61,7 +63,7 @@ class AdminApp:
             st.write(f"Current Status: {'Inside Campus' if emp['current_status'] == 'entry' else 'Outside Campus'}")
             
             if emp['last_log_time']:
-                last_log_time = datetime.datetime.strptime(emp['last_log_time'], "%Y-%m-%d %H:%M:%S.%f")
+                last_log_time = datetime.datetime.fromisoformat(emp['last_log_time'])
                 time_since_last_log = datetime.datetime.now() - last_log_time
                 
                 # Calculate hours and minutes
@@ -82,17 +84,20 @@ class AdminApp:
         institute_id = st.text_input("Employee Institute ID")
 
         registration_method = st.radio("Registration Method", ["Upload Photos", "Live Capture"])
+        allow_duplicate = st.checkbox("Register even if the face matches an existing employee")
 
         if registration_method == "Upload Photos":
             uploaded_files = st.file_uploader("Upload 10 face images", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
             if st.button("Register") and name and institute_id and len(uploaded_files) == 10:
-                self.process_uploaded_photos(name, institute_id, uploaded_files)
+                self.process_uploaded_photos(name, institute_id, uploaded_files, allow_duplicate)
         else:
             if st.button("Start Live Registration") and name and institute_id:
-                self.employee_registrar.capture_face_samples(name, institute_id)
-                st.success(f"Live registration completed for {name}")
+                if self.employee_registrar.capture_face_samples(name, institute_id, allow_duplicate):
+                    st.success(f"Live registration completed for {name}")
+                else:
+                    st.error(f"Live registration failed for {name}")
 
-    def process_uploaded_photos(self, name, institute_id, uploaded_files):
+    def process_uploaded_photos(self, name, institute_id, uploaded_files, allow_duplicate=False):
         embeddings = []
         for file in uploaded_files:
             image = Image.open(file)
@@ -104,8 +109,9 @@ class AdminApp:
         if embeddings:
             avg_embedding = np.mean(embeddings, axis=0)
             avg_embedding /= np.linalg.norm(avg_embedding)
+            templates = self.face_processor.build_templates(embeddings)
             try:
-                self.db.save_employee(institute_id, name, avg_embedding, Image.open(uploaded_files[0]))
+                self.db.save_employee(institute_id, name, avg_embedding, Image.open(uploaded_files[0]), allow_duplicate, templates)
                 st.success(f"Successfully registered {name}")
             except Exception as e:
                 st.error(f"Failed to register employee: {str(e)}")
@@ -158,10 +164,10 @@ class AdminApp:
         date = st.date_input("Select Date")
         
         if log_type == "Entry Logs":
-            logs = self.db.get_entry_logs_by_date(date)
+            logs = self.db.get_entry_logs_by_date(date, include_archive=True)
             self.display_logs(logs, "Entry")
         else:
-            logs = self.db.get_exit_logs_by_date(date)
+            logs = self.db.get_exit_logs_by_date(date, include_archive=True)
             self.display_logs(logs, "Exit")
 
     def display_logs(self, logs, log_type):
@@ -200,6 +206,37 @@ class AdminApp:
                 selected_logs.append(log[0])
         return selected_logs
 
+    def attendance_reports(self):
+        st.header("Attendance Reports")
+        start_date = st.date_input("Start Date", value=datetime.date.today() - datetime.timedelta(days=7))
+        end_date = st.date_input("End Date", value=datetime.date.today())
+
+        st.metric("Headcount Inside", self.db.get_headcount_inside(end_date))
+
+        summaries = self.db.get_daily_summaries(start_date, end_date)
+        if not summaries:
+            st.info("No attendance recorded for the selected dates")
+            return
+
+        st.caption("Stays that cross midnight are split between the two days. Someone still inside is counted "
+                   "up to now, or up to midnight for earlier days; days with no entry or exit of their own are not listed.")
+        rows = []
+        for summary in summaries:
+            hours, remainder = divmod(int(summary['seconds_on_site']), 3600)
+            minutes = remainder // 60
+            rows.append({
+                'Date': summary['day'],
+                'Institute ID': summary['employee_institute_id'],
+                'Name': summary['name'],
+                'First In': summary['first_in'],
+                'Last Out': summary['last_out'],
+                'Entries': summary['entry_count'],
+                'Exits': summary['exit_count'],
+                'Hours On Site': f"{hours}h {minutes:02d}m",
+                'Status': 'Inside' if summary['last_event_type'] == 'entry' else 'Outside'
+            })
+        st.table(rows)
+
 if __name__ == "__main__":
     app = AdminApp()
     app.run()
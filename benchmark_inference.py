@@ -0,0 +1,53 @@
+# benchmark_inference.py
+import argparse
+import time
+import cv2
+import numpy as np
+from face_processor import FaceProcessor, get_inference_profile
+
+
+def time_call(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.median(timings), np.percentile(timings, 95)
+
+
+def benchmark_profile(profile, iterations, image=None):
+    """Per-model and end-to-end latency (ms) for one inference profile"""
+    start = time.perf_counter()
+    processor = FaceProcessor(profile)
+    startup = (time.perf_counter() - start) * 1000
+
+    results = {"startup": (startup, startup)}
+    for name, model in processor.app.models.items():
+        inputs = processor.dummy_inputs(model)
+        results[name] = time_call(lambda: model.session.run(None, inputs), iterations)
+    if image is not None:
+        results["pipeline"] = time_call(lambda: processor.app.get(image), iterations)
+    return results
+
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep ONNX Runtime thread settings and report per-model latency")
+    parser.add_argument("--profile", default="cpu", help="Base inference profile from CONFIG['INFERENCE_PROFILES']")
+    parser.add_argument("--intra-op-threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--inter-op-threads", type=int, nargs="+", default=[1])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--image", help="Optional face image to time the full detection + recognition pipeline")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image) if args.image else None
+    for intra_op_threads in args.intra_op_threads:
+        for inter_op_threads in args.inter_op_threads:
+            profile = {
+                **get_inference_profile(args.profile),
+                "intra_op_threads": intra_op_threads,
+                "inter_op_threads": inter_op_threads
+            }
+            print(f"\nintra_op_threads={intra_op_threads} inter_op_threads={inter_op_threads}")
+            for name, (median, p95) in benchmark_profile(profile, args.iterations, image).items():
+                print(f"  {name:<12} median {median:8.2f} ms   p95 {p95:8.2f} ms")
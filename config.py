@@ -16,9 +16,46 @@ CONFIG = {
     "EMPLOYEE_DATA_ROOT": "data/employees",
     "EMBEDDINGS_PATH": "employee_embeddings",
     "MAX_CAPTURE_IMAGES": 10,
-    "FACE_DETECTION_CONFIDENCE": 0.6
+    "FACE_DETECTION_CONFIDENCE": 0.6,
+    "DUPLICATE_IDENTITY_THRESHOLD": 0.6,
+    "MAX_TEMPLATES_PER_EMPLOYEE": 5,
+    "GALLERY_MATCHING": "templates",  # "templates" (max over per-pose templates) or "mean" (single mean embedding)
+    # Single-writer database service ("host:port"); unset means every app writes to the database directly
+    "DATABASE_SERVICE_ADDRESS": os.environ.get("DATABASE_SERVICE_ADDRESS"),
+    "DATABASE_SERVICE_AUTHKEY": os.environ.get("DATABASE_SERVICE_AUTHKEY"),  # Shared secret; required to use the service
+    "DATABASE_SERVICE_BATCH_SIZE": 256,
+    "DATABASE_SERVICE_COMMIT_INTERVAL": 0.0,  # Extra seconds to wait for more writes before committing a batch
+    "DATABASE_SERVICE_TIMEOUT": 30.0,  # Seconds a blocking client waits for a write to be committed
+    "LOG_ARCHIVE_ROOT": "data/log_archive",
+    "LOG_RETENTION_DAYS": 365,
+    "LOG_ARCHIVE_BATCH_SIZE": 5000,
+    # ONNX Runtime execution profile, overridable per process with the INFERENCE_PROFILE environment variable
+    "INFERENCE_PROFILE": os.environ.get("INFERENCE_PROFILE", "default"),
+    "INFERENCE_PROFILES": {
+        "default": {
+            "providers": ["CUDAExecutionProvider", "CPUExecutionProvider"],
+            "ctx_id": 0,
+            "det_size": (640, 640),
+            "intra_op_threads": 0,  # 0 lets ONNX Runtime use all cores
+            "inter_op_threads": 0,
+            "graph_optimization_level": "all",
+            "execution_mode": "sequential",
+            "warmup_runs": 0
+        },
+        "cpu": {
+            "providers": ["CPUExecutionProvider"],
+            "ctx_id": -1,
+            "det_size": (640, 640),
+            "intra_op_threads": 2,
+            "inter_op_threads": 1,
+            "graph_optimization_level": "all",
+            "execution_mode": "sequential",
+            "warmup_runs": 3
+        }
+    }
 }
 
 # Create necessary directories
 os.makedirs(CONFIG["EMPLOYEE_DATA_ROOT"], exist_ok=True)
 os.makedirs(CONFIG["EMBEDDINGS_PATH"], exist_ok=True)
+os.makedirs(CONFIG["LOG_ARCHIVE_ROOT"], exist_ok=True)
@@ -1,16 +1,43 @@
 # database_handler.py
 import sqlite3
 import datetime
+import itertools
+import os
+import pathlib
 from contextlib import contextmanager
 from config import CONFIG
 import io
 from PIL import Image
 import numpy as np
 
+class DuplicateIdentityError(Exception):
+    """Raised when a new embedding matches an already enrolled employee too closely"""
+    def __init__(self, matches):
+        self.matches = matches
+        candidates = ", ".join(
+            f"{match['name']} (ID: {match['employee_institute_id']}, similarity {match['similarity']:.2f})"
+            for match in matches
+        )
+        super().__init__(f"Possible duplicate of {candidates}")
+
+    def __reduce__(self):
+        # Rebuild from the matches when sent back from the database service
+        return (self.__class__, (self.matches,))
+
 class DatabaseManager:
+    def __init__(self, database_name=None, read_only=False):
+        self.database_name = database_name or CONFIG["DATABASE_NAME"]
+        self.read_only = read_only
+        if not read_only:
+            self.initialize_database()
+
     @contextmanager
     def get_connection(self):
-        conn = sqlite3.connect(CONFIG["DATABASE_NAME"])
+        if self.read_only:
+            uri = pathlib.Path(self.database_name).absolute().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+        else:
+            conn = sqlite3.connect(self.database_name)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
@@ -47,26 +74,261 @@ class DatabaseManager:
                     FOREIGN KEY(employee_id) REFERENCES employees(id)
                 )
             ''')
+            # One row per employee per day, kept up to date by the log writers
+            summaries_missing = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'attendance_daily'"
+            ).fetchone() is None
+            if summaries_missing:
+                # Create and fill the table in one transaction, so an upgraded database never sees it empty
+                conn.execute("BEGIN")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS attendance_daily (
+                    employee_id INTEGER,
+                    day DATE,
+                    employee_name TEXT,
+                    first_in DATETIME,
+                    last_out DATETIME,
+                    entry_count INTEGER,
+                    exit_count INTEGER,
+                    seconds_on_site REAL,
+                    last_event_type TEXT,
+                    last_event_time DATETIME,
+                    open_since DATETIME,
+                    PRIMARY KEY (employee_id, day),
+                    FOREIGN KEY(employee_id) REFERENCES employees(id)
+                )
+            ''')
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(attendance_daily)")]
+            if 'open_since' not in columns:
+                conn.execute("ALTER TABLE attendance_daily ADD COLUMN open_since DATETIME")
+            # Per-pose templates, stored as float16 to keep the gallery compact
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS employee_templates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    employee_id INTEGER,
+                    pose TEXT,
+                    embedding BLOB,
+                    FOREIGN KEY(employee_id) REFERENCES employees(id)
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_employee_templates_employee ON employee_templates (employee_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entry_logs_employee_time ON entry_logs (employee_id, entry_time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_exit_logs_employee_time ON exit_logs (employee_id, exit_time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entry_logs_time ON entry_logs (entry_time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_exit_logs_time ON exit_logs (exit_time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_daily_day ON attendance_daily (day)")
+            if summaries_missing:
+                rows = self._rebuild_daily_summaries(conn)
+                if rows:
+                    print(f"Built {rows} daily attendance summaries from the existing logs")
             conn.commit()
-    
-    def save_employee(self, employee_institute_id, name, embedding, profile_photo):
-        """Save employee data to database"""
+
+    @staticmethod
+    def _summarize_day(events, day, carried_in=False):
+        """Build a summary row from one employee-day of (type, time, name) events sorted by time.
+
+        Stays are split at midnight: when the employee was still inside at the
+        end of the previous day (carried_in) their time counts from 00:00, and
+        an interval still open after the last event is left in open_since for
+        the reader to close at midnight or now.
+        """
+        first_in = last_out = None
+        inside_since = datetime.datetime.fromisoformat(str(day)[:10]) if carried_in else None
+        entry_count = exit_count = 0
+        seconds_on_site = 0.0
+        for event_type, event_time, _ in events:
+            timestamp = datetime.datetime.fromisoformat(str(event_time))
+            if event_type == 'entry':
+                entry_count += 1
+                first_in = first_in or event_time
+                if inside_since is None:
+                    inside_since = timestamp
+            else:
+                exit_count += 1
+                last_out = event_time
+                if inside_since is not None:
+                    seconds_on_site += (timestamp - inside_since).total_seconds()
+                    inside_since = None
+        last_event_type, last_event_time, employee_name = events[-1]
+        return {
+            'employee_name': employee_name,
+            'first_in': first_in,
+            'last_out': last_out,
+            'entry_count': entry_count,
+            'exit_count': exit_count,
+            'seconds_on_site': seconds_on_site,
+            'last_event_type': last_event_type,
+            'last_event_time': last_event_time,
+            'open_since': inside_since.isoformat(sep=' ') if inside_since is not None else None
+        }
+
+    def _write_daily_summary(self, conn, employee_id, day, summary):
+        conn.execute(
+            "INSERT OR REPLACE INTO attendance_daily (employee_id, day, employee_name, first_in, last_out, "
+            "entry_count, exit_count, seconds_on_site, last_event_type, last_event_time, open_since) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (employee_id, day, summary['employee_name'], summary['first_in'], summary['last_out'],
+             summary['entry_count'], summary['exit_count'], summary['seconds_on_site'],
+             summary['last_event_type'], summary['last_event_time'], summary['open_since'])
+        )
+
+    def _refresh_daily_summary(self, conn, employee_id, day, cascade=True):
+        """Recompute the summary row for one employee and day inside the caller's transaction.
+
+        The next summarized day is refreshed as well, since whether it starts
+        inside depends on how this day ended.
+        """
+        day = str(day)[:10]
+        next_day = (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+        events = conn.execute(
+            "SELECT 'entry', entry_time, employee_name FROM entry_logs "
+            "WHERE employee_id = ? AND entry_time >= ? AND entry_time < ? "
+            "UNION ALL "
+            "SELECT 'exit', exit_time, employee_name FROM exit_logs "
+            "WHERE employee_id = ? AND exit_time >= ? AND exit_time < ? "
+            "ORDER BY 2, 1",
+            (employee_id, day, next_day, employee_id, day, next_day)
+        ).fetchall()
+        if events:
+            previous = conn.execute(
+                "SELECT last_event_type FROM attendance_daily WHERE employee_id = ? AND day < ? "
+                "ORDER BY day DESC LIMIT 1",
+                (employee_id, day)
+            ).fetchone()
+            carried_in = previous is not None and previous['last_event_type'] == 'entry'
+            self._write_daily_summary(conn, employee_id, day, self._summarize_day(events, day, carried_in))
+        else:
+            conn.execute("DELETE FROM attendance_daily WHERE employee_id = ? AND day = ?", (employee_id, day))
+
+        if cascade:
+            following = conn.execute(
+                "SELECT day FROM attendance_daily WHERE employee_id = ? AND day > ? ORDER BY day LIMIT 1",
+                (employee_id, day)
+            ).fetchone()
+            if following:
+                self._refresh_daily_summary(conn, employee_id, following['day'], cascade=False)
+
+    def rebuild_daily_summaries(self):
+        """Recompute the attendance_daily table from the entry/exit logs.
+
+        Days older than the earliest remaining log have been moved to the log
+        archive, so their summaries are kept as they are.
+        """
+        with self.get_connection() as conn:
+            try:
+                rows = self._rebuild_daily_summaries(conn)
+                conn.commit()
+                print(f"Rebuilt {rows} daily attendance summaries")
+                return rows
+            except sqlite3.Error as e:
+                print(f"Summary rebuild failed: {str(e)}")
+                conn.rollback()
+                raise
+
+    def _rebuild_daily_summaries(self, conn):
+        conn.execute(
+            "DELETE FROM attendance_daily WHERE day >= ("
+            "SELECT DATE(MIN(t)) FROM (SELECT MIN(entry_time) AS t FROM entry_logs "
+            "UNION ALL SELECT MIN(exit_time) FROM exit_logs))"
+        )
+        cursor = conn.execute(
+            "SELECT employee_id, 'entry', entry_time, employee_name FROM entry_logs WHERE entry_time IS NOT NULL "
+            "UNION ALL "
+            "SELECT employee_id, 'exit', exit_time, employee_name FROM exit_logs WHERE exit_time IS NOT NULL "
+            "ORDER BY 1, 3, 2"
+        )
+        rows = 0
+        # Whether each employee was inside at the end of their last summarized day
+        inside = {
+            row['employee_id']: row['last_event_type'] == 'entry'
+            for row in conn.execute(
+                "SELECT employee_id, last_event_type FROM attendance_daily AS s "
+                "WHERE day = (SELECT MAX(day) FROM attendance_daily WHERE employee_id = s.employee_id)"
+            )
+        }
+        for (employee_id, day), events in itertools.groupby(cursor, key=lambda row: (row[0], str(row[2])[:10])):
+            summary = self._summarize_day([tuple(event)[1:] for event in events], day,
+                                          inside.get(employee_id, False))
+            self._write_daily_summary(conn, employee_id, day, summary)
+            inside[employee_id] = summary['last_event_type'] == 'entry'
+            rows += 1
+        return rows
+
+    def _find_similar_employees(self, conn, embedding, top_k, block_size):
+        query = embedding / np.linalg.norm(embedding)
+        best = []
+        cursor = conn.execute("SELECT id, employee_institute_id, name, encoding FROM employees")
+        while True:
+            rows = cursor.fetchmany(block_size)
+            if not rows:
+                break
+            block = np.stack([np.frombuffer(row['encoding'], dtype=np.float32) for row in rows])
+            scores = block @ query / np.linalg.norm(block, axis=1)
+            for index in np.argsort(scores)[::-1][:top_k]:
+                row = rows[index]
+                best.append({
+                    'id': row['id'],
+                    'employee_institute_id': row['employee_institute_id'],
+                    'name': row['name'],
+                    'similarity': float(scores[index])
+                })
+            best = sorted(best, key=lambda match: match['similarity'], reverse=True)[:top_k]
+        return best
+
+    def find_similar_employees(self, embedding, top_k=3, block_size=4096):
+        """Return the top_k enrolled employees closest to an embedding, most similar first"""
+        with self.get_connection() as conn:
+            return self._find_similar_employees(conn, embedding, top_k, block_size)
+
+    def _check_duplicate_identity(self, conn, embedding):
+        matches = [
+            match for match in self._find_similar_employees(conn, embedding, 3, 4096)
+            if match['similarity'] >= CONFIG["DUPLICATE_IDENTITY_THRESHOLD"]
+        ]
+        if matches:
+            raise DuplicateIdentityError(matches)
+
+    def check_duplicate_identity(self, embedding):
+        """Raise DuplicateIdentityError if the embedding matches an enrolled employee"""
+        with self.get_connection() as conn:
+            self._check_duplicate_identity(conn, embedding)
+
+    def save_employee(self, employee_institute_id, name, embedding, profile_photo, allow_duplicate=False, templates=None):
+        """Save employee data to database, refusing faces that match an enrolled employee.
+
+        templates is an optional list of (pose, embedding) pairs stored alongside the mean embedding.
+        """
+        if not np.all(np.isfinite(embedding)) or not all(np.all(np.isfinite(template)) for _, template in templates or []):
+            print(f"Employee {name} was not saved: embedding contains NaN or infinite values")
+            raise ValueError("Embedding contains NaN or infinite values")
+
         with self.get_connection() as conn:
             try:
+                if not allow_duplicate:
+                    self._check_duplicate_identity(conn, embedding)
+
                 # Convert PIL Image to bytes
                 img_byte_arr = io.BytesIO()
                 profile_photo.save(img_byte_arr, format='JPEG')
                 img_byte_arr = img_byte_arr.getvalue()
 
-                conn.execute(
+                cursor = conn.execute(
                     "INSERT INTO employees (employee_institute_id, name, encoding, profile_photo) VALUES (?, ?, ?, ?)",
                     (employee_institute_id, name, embedding.tobytes(), img_byte_arr)
                 )
+                for pose, template in (templates or [])[:CONFIG["MAX_TEMPLATES_PER_EMPLOYEE"]]:
+                    conn.execute(
+                        "INSERT INTO employee_templates (employee_id, pose, embedding) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, pose, np.asarray(template, dtype=np.float16).tobytes())
+                    )
                 conn.commit()
                 print(f"Employee {name} saved successfully")
             except sqlite3.IntegrityError:
                 print(f"Employee with ID {employee_institute_id} already exists!")
                 raise
+            except DuplicateIdentityError as e:
+                print(f"Employee {name} was not saved: {str(e)}")
+                raise
     
     def update_employee_embedding(self, employee_institute_id, new_embedding):
         """Update the embedding for an employee"""
@@ -77,24 +339,28 @@ class DatabaseManager:
             )
             conn.commit()
     
-    def log_entry(self, employee_id, employee_name):
-        """Record employee entry"""
+    def update_employee_template(self, template_id, new_embedding):
+        """Update one pose template of an employee"""
         with self.get_connection() as conn:
             conn.execute(
-                "INSERT INTO entry_logs (employee_id, employee_name, entry_time) VALUES (?, ?, ?)",
-                (employee_id, employee_name, datetime.datetime.now())
+                "UPDATE employee_templates SET embedding = ? WHERE id = ?",
+                (np.asarray(new_embedding, dtype=np.float16).tobytes(), template_id)
             )
             conn.commit()
-    
-    def log_exit(self, employee_id, employee_name):
-        """Record employee exit"""
+
+    def get_employee_templates(self):
+        """Retrieve all pose templates, grouped by employee id"""
         with self.get_connection() as conn:
-            conn.execute(
-                "INSERT INTO exit_logs (employee_id, employee_name, exit_time) VALUES (?, ?, ?)",
-                (employee_id, employee_name, datetime.datetime.now())
-            )
-            conn.commit()
-    
+            cursor = conn.execute("SELECT id, employee_id, pose, embedding FROM employee_templates ORDER BY employee_id, id")
+            templates = {}
+            for row in cursor:
+                templates.setdefault(row['employee_id'], []).append({
+                    'id': row['id'],
+                    'pose': row['pose'],
+                    'embedding': np.frombuffer(row['embedding'], dtype=np.float16).astype(np.float32)
+                })
+            return templates
+
     def get_employee_data(self):
         """Retrieve all employee data"""
         with self.get_connection() as conn:
@@ -172,39 +438,47 @@ class DatabaseManager:
     def delete_entry_log(self, log_id):
         with self.get_connection() as conn:
             try:
+                log = conn.execute("SELECT employee_id, entry_time FROM entry_logs WHERE id = ?", (log_id,)).fetchone()
                 conn.execute("DELETE FROM entry_logs WHERE id = ?", (log_id,))
+                if log and log['entry_time']:
+                    self._refresh_daily_summary(conn, log['employee_id'], log['entry_time'])
                 conn.commit()
                 return True
             except sqlite3.Error:
+                conn.rollback()
                 return False
 
     def delete_exit_log(self, log_id):
         with self.get_connection() as conn:
             try:
+                log = conn.execute("SELECT employee_id, exit_time FROM exit_logs WHERE id = ?", (log_id,)).fetchone()
                 conn.execute("DELETE FROM exit_logs WHERE id = ?", (log_id,))
+                if log and log['exit_time']:
+                    self._refresh_daily_summary(conn, log['employee_id'], log['exit_time'])
                 conn.commit()
                 return True
             except sqlite3.Error:
+                conn.rollback()
                 return False
             
 
     def get_employee_details(self, employee_institute_id):
         with self.get_connection() as conn:
             emp = conn.execute("SELECT * FROM employees WHERE employee_institute_id = ?", (employee_institute_id,)).fetchone()
-            entry_count = conn.execute("SELECT COUNT(*) FROM entry_logs WHERE employee_id = ?", (emp['id'],)).fetchone()[0]
-            exit_count = conn.execute("SELECT COUNT(*) FROM exit_logs WHERE employee_id = ?", (emp['id'],)).fetchone()[0]
-            
-            last_entry = conn.execute("SELECT MAX(entry_time) FROM entry_logs WHERE employee_id = ?", (emp['id'],)).fetchone()[0]
-            last_exit = conn.execute("SELECT MAX(exit_time) FROM exit_logs WHERE employee_id = ?", (emp['id'],)).fetchone()[0]
-            
-            if last_entry and (not last_exit or last_entry > last_exit):
-                last_log_type = 'entry'
-                last_log_time = last_entry
-                current_status = 'entry'
-            elif last_exit:
-                last_log_type = 'exit'
-                last_log_time = last_exit
-                current_status = 'exit'
+            totals = conn.execute(
+                "SELECT COALESCE(SUM(entry_count), 0), COALESCE(SUM(exit_count), 0) FROM attendance_daily WHERE employee_id = ?",
+                (emp['id'],)
+            ).fetchone()
+            last_day = conn.execute(
+                "SELECT last_event_type, last_event_time FROM attendance_daily "
+                "WHERE employee_id = ? ORDER BY day DESC LIMIT 1",
+                (emp['id'],)
+            ).fetchone()
+
+            if last_day:
+                last_log_type = last_day['last_event_type']
+                last_log_time = last_day['last_event_time']
+                current_status = last_log_type
             else:
                 last_log_type = None
                 last_log_time = None
@@ -214,54 +488,108 @@ class DatabaseManager:
                 'employee_institute_id': emp['employee_institute_id'],
                 'name': emp['name'],
                 'photo': Image.open(io.BytesIO(emp['profile_photo'])),
-                'entry_count': entry_count,
-                'exit_count': exit_count,
+                'entry_count': totals[0],
+                'exit_count': totals[1],
                 'last_log_type': last_log_type,
                 'last_log_time': last_log_time,
                 'current_status': current_status
             }
 
-    def get_entry_logs_by_date(self, date):
+    def get_daily_summaries(self, start_date, end_date):
+        """Per-employee daily attendance summaries between two dates (inclusive)"""
         with self.get_connection() as conn:
             cursor = conn.execute(
-                "SELECT entry_logs.id, employees.name, entry_logs.entry_time FROM entry_logs "
-                "JOIN employees ON entry_logs.employee_id = employees.id "
-                "WHERE DATE(entry_time) = ? ORDER BY entry_time DESC",
-                (date.strftime("%Y-%m-%d"),)
+                "SELECT attendance_daily.*, employees.employee_institute_id, employees.name FROM attendance_daily "
+                "JOIN employees ON attendance_daily.employee_id = employees.id "
+                "WHERE day BETWEEN ? AND ? ORDER BY day DESC, employees.name",
+                (start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
             )
-            return cursor.fetchall()
+            now = datetime.datetime.now()
+            summaries = []
+            for row in cursor.fetchall():
+                summary = dict(row)
+                # Close a stay that is still open at midnight, or now for today
+                if summary['open_since']:
+                    midnight = datetime.datetime.fromisoformat(summary['day']) + datetime.timedelta(days=1)
+                    open_since = datetime.datetime.fromisoformat(summary['open_since'])
+                    summary['seconds_on_site'] += max((min(now, midnight) - open_since).total_seconds(), 0.0)
+                summaries.append(summary)
+            return summaries
 
-    def get_exit_logs_by_date(self, date):
+    def get_headcount_inside(self, date):
+        """Number of employees whose last recorded event on or before the given date is an entry"""
         with self.get_connection() as conn:
             cursor = conn.execute(
-                "SELECT exit_logs.id, employees.name, exit_logs.exit_time FROM exit_logs "
-                "JOIN employees ON exit_logs.employee_id = employees.id "
-                "WHERE DATE(exit_time) = ? ORDER BY exit_time DESC",
+                "SELECT COUNT(*) FROM attendance_daily AS s "
+                "JOIN employees ON s.employee_id = employees.id "
+                "WHERE s.last_event_type = 'entry' AND s.day = ("
+                "SELECT MAX(day) FROM attendance_daily WHERE employee_id = s.employee_id AND day <= ?)",
                 (date.strftime("%Y-%m-%d"),)
             )
+            return cursor.fetchone()[0]
+
+    def get_archive_path(self, date):
+        """Path of the monthly archive database holding logs for the given date"""
+        return os.path.join(CONFIG["LOG_ARCHIVE_ROOT"], f"logs_{date.strftime('%Y_%m')}.db")
+
+    def _get_logs_by_date(self, table, time_column, date, include_archive):
+        archive_path = self.get_archive_path(date)
+        with self.get_connection() as conn:
+            query = (
+                f"SELECT {table}.id, employees.name, {table}.{time_column} FROM {table} "
+                f"JOIN employees ON {table}.employee_id = employees.id "
+                f"WHERE {table}.{time_column} >= ? AND {table}.{time_column} < ?"
+            )
+            # A range on the raw column (not DATE()) lets SQLite use the time indexes
+            params = (date.strftime("%Y-%m-%d"), (date + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
+            if include_archive and os.path.exists(archive_path):
+                conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                query += (
+                    f" UNION ALL SELECT archived.id, employees.name, archived.{time_column} FROM archive.{table} AS archived "
+                    f"JOIN employees ON archived.employee_id = employees.id "
+                    f"WHERE archived.{time_column} >= ? AND archived.{time_column} < ?"
+                )
+                params += params
+            cursor = conn.execute(query + " ORDER BY 3 DESC", params)
             return cursor.fetchall()
-        
+
+    def get_entry_logs_by_date(self, date, include_archive=False):
+        return self._get_logs_by_date("entry_logs", "entry_time", date, include_archive)
+
+    def get_exit_logs_by_date(self, date, include_archive=False):
+        return self._get_logs_by_date("exit_logs", "exit_time", date, include_archive)
+
     def log_entry(self, employee_id, employee_name, entry_time=None):
-        """Record employee entry"""
+        """Record employee entry; refused if the employee has been deleted in the meantime"""
         with self.get_connection() as conn:
+            if conn.execute("SELECT 1 FROM employees WHERE id = ?", (employee_id,)).fetchone() is None:
+                print(f"Entry not logged for {employee_name}: employee no longer exists")
+                return False
             if entry_time is None:
                 entry_time = datetime.datetime.now()
             conn.execute(
                 "INSERT INTO entry_logs (employee_id, employee_name, entry_time) VALUES (?, ?, ?)",
                 (employee_id, employee_name, entry_time)
             )
+            self._refresh_daily_summary(conn, employee_id, entry_time)
             conn.commit()
+            return True
 
     def log_exit(self, employee_id, employee_name, exit_time=None):
-        """Record employee exit"""
+        """Record employee exit; refused if the employee has been deleted in the meantime"""
         with self.get_connection() as conn:
+            if conn.execute("SELECT 1 FROM employees WHERE id = ?", (employee_id,)).fetchone() is None:
+                print(f"Exit not logged for {employee_name}: employee no longer exists")
+                return False
             if exit_time is None:
                 exit_time = datetime.datetime.now()
             conn.execute(
                 "INSERT INTO exit_logs (employee_id, employee_name, exit_time) VALUES (?, ?, ?)",
                 (employee_id, employee_name, exit_time)
             )
+            self._refresh_daily_summary(conn, employee_id, exit_time)
             conn.commit()
+            return True
 
     def delete_employee(self, employee_institute_id):
         """Delete an employee and their logs"""
@@ -277,6 +605,8 @@ class DatabaseManager:
                 
                 conn.execute("DELETE FROM entry_logs WHERE employee_id = ?", (employee_id,))
                 conn.execute("DELETE FROM exit_logs WHERE employee_id = ?", (employee_id,))
+                conn.execute("DELETE FROM attendance_daily WHERE employee_id = ?", (employee_id,))
+                conn.execute("DELETE FROM employee_templates WHERE employee_id = ?", (employee_id,))
                 conn.execute("DELETE FROM employees WHERE id = ?", (employee_id,))
                 
                 conn.commit()
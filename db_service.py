@@ -0,0 +1,299 @@
+# db_service.py
+import argparse
+import functools
+import itertools
+import pickle
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Listener
+from config import CONFIG
+from database_handler import DatabaseManager, DuplicateIdentityError
+
+# DatabaseManager methods that modify the database. Only the service executes them.
+WRITE_METHODS = {
+    "save_employee",
+    "update_employee_embedding",
+    "update_employee_template",
+    "log_entry",
+    "log_exit",
+    "delete_entry_log",
+    "delete_exit_log",
+    "delete_employee",
+    "rebuild_daily_summaries"
+}
+
+# Writes where only the latest request per key matters; earlier ones in the same batch are skipped
+COALESCED_METHODS = {"update_employee_embedding", "update_employee_template"}
+
+
+def parse_address(address):
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def get_authkey(authkey=None):
+    """Shared secret for the service connection; refuses to fall back to a well-known key"""
+    authkey = authkey or CONFIG["DATABASE_SERVICE_AUTHKEY"]
+    if not authkey:
+        raise ValueError("DATABASE_SERVICE_AUTHKEY is not set. Generate one with: "
+                         "python -c \"import secrets; print(secrets.token_hex(32))\"")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class _BatchConnection:
+    """Connection handed to DatabaseManager methods inside a group commit.
+
+    Commits are deferred to the end of the batch and rollbacks only undo the
+    current request's savepoint.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK TO request")
+
+    def close(self):
+        pass
+
+
+class _BatchDatabaseManager(DatabaseManager):
+    def __init__(self, conn, database_name):
+        self.database_name = database_name
+        self.read_only = False
+        self.conn = conn
+
+    @contextmanager
+    def get_connection(self):
+        yield _BatchConnection(self.conn)
+
+
+class DatabaseService:
+    """Single writer for the database: queues write requests from clients and group-commits them"""
+    def __init__(self, database_name=None, address=None, authkey=None, batch_size=None, commit_interval=None):
+        self.database_name = database_name or CONFIG["DATABASE_NAME"]
+        self.address = parse_address(address or CONFIG["DATABASE_SERVICE_ADDRESS"] or "localhost:6543")
+        self.authkey = get_authkey(authkey)
+        self.batch_size = batch_size or CONFIG["DATABASE_SERVICE_BATCH_SIZE"]
+        self.commit_interval = CONFIG["DATABASE_SERVICE_COMMIT_INTERVAL"] if commit_interval is None else commit_interval
+        self.requests = queue.Queue()
+        self.listener = None
+        self.writer_thread = None
+        self.batches = 0
+        self.writes = 0
+
+    def start(self):
+        DatabaseManager(self.database_name)  # Create any missing tables before clients connect
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer_thread.start()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"Database service for {self.database_name} listening on {self.address[0]}:{self.address[1]}")
+        return self
+
+    def serve_forever(self):
+        self.start()
+        self.writer_thread.join()
+
+    def stop(self):
+        self.requests.put(None)
+        self.listener.close()
+        self.writer_thread.join()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._receive_loop, args=(client,), daemon=True).start()
+
+    def _receive_loop(self, client):
+        while True:
+            try:
+                request_id, method, args, kwargs = client.recv()
+            except (EOFError, OSError):
+                return
+            self.requests.put((client, request_id, method, args, kwargs))
+
+    def _next_batch(self):
+        """Block for one request, then take whatever else is queued (up to batch_size)"""
+        first = self.requests.get()
+        if first is None:
+            return None, True
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                request = self.requests.get(timeout=self.commit_interval) if self.commit_interval else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.database_name, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers keep their own connections without blocking the writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        manager = _BatchDatabaseManager(conn, self.database_name)
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    self._execute_batch(conn, manager, batch)
+        finally:
+            conn.close()
+
+    def _execute_batch(self, conn, manager, batch):
+        latest = {}
+        for index, (_, _, method, args, _) in enumerate(batch):
+            if method in COALESCED_METHODS and args:
+                latest[(method, args[0])] = index
+
+        results = [None] * len(batch)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for index, (_, _, method, args, kwargs) in enumerate(batch):
+                if method not in WRITE_METHODS:
+                    results[index] = (False, AttributeError(f"{method} is not a database write"))
+                    continue
+                if method in COALESCED_METHODS and args and latest[(method, args[0])] != index:
+                    results[index] = latest[(method, args[0])]  # Answered with the request that supersedes it
+                    continue
+
+                conn.execute("SAVEPOINT request")
+                try:
+                    results[index] = (True, getattr(manager, method)(*args, **kwargs))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO request")
+                    results[index] = (False, e)
+                conn.execute("RELEASE request")
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Nothing in the batch is committed; fail every request and keep the writer running
+            print(f"Batch failed: {str(e)}")
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error as rollback_error:
+                print(f"Batch rollback failed: {str(rollback_error)}")
+            results = [(False, e)] * len(batch)
+
+        self.batches += 1
+        self.writes += len(batch)
+        self._reply(batch, [results[result] if isinstance(result, int) else result for result in results])
+
+    def _reply(self, batch, results):
+        for (client, request_id, _, _, _), (ok, result) in zip(batch, results):
+            if not ok:
+                try:
+                    pickle.dumps(result)
+                except Exception:
+                    result = RuntimeError(repr(result))
+            try:
+                client.send((request_id, ok, result))
+            except OSError:
+                pass  # Client went away; the write is committed regardless
+
+
+class DatabaseClient:
+    """Mirrors DatabaseManager: writes go to the database service, reads use a read-only connection.
+
+    Write methods return a concurrent.futures.Future resolved once the write is
+    committed (wrap it with asyncio.wrap_future in async code), or the result
+    itself when the client is blocking.
+    """
+    def __init__(self, address=None, authkey=None, database_name=None, blocking=False):
+        authkey = get_authkey(authkey)
+        self.reader = DatabaseManager(database_name, read_only=True)
+        self.blocking = blocking
+        self.connection = Client(parse_address(address or CONFIG["DATABASE_SERVICE_ADDRESS"]), authkey=authkey)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.request_ids = itertools.count()
+        threading.Thread(target=self._receive_loop, daemon=True).start()
+
+    def __getattr__(self, name):
+        if name in WRITE_METHODS:
+            return functools.partial(self._submit, name)
+        reader = self.__dict__.get("reader")
+        if reader is None:
+            raise AttributeError(name)
+        return getattr(reader, name)
+
+    def save_employee(self, employee_institute_id, name, embedding, profile_photo, allow_duplicate=False, templates=None):
+        """Run the duplicate search on the read-only connection so the writer only does the insert"""
+        if not allow_duplicate:
+            try:
+                self.reader.check_duplicate_identity(embedding)
+            except DuplicateIdentityError as e:
+                print(f"Employee {name} was not saved: {str(e)}")
+                raise
+        return self._submit("save_employee", employee_institute_id, name, embedding, profile_photo,
+                            allow_duplicate=True, templates=templates)
+
+    def _submit(self, method, *args, **kwargs):
+        future = Future()
+        with self.lock:
+            request_id = next(self.request_ids)
+            self.pending[request_id] = future
+            self.connection.send((request_id, method, args, kwargs))
+        return future.result(timeout=CONFIG["DATABASE_SERVICE_TIMEOUT"]) if self.blocking else future
+
+    def _receive_loop(self):
+        while True:
+            try:
+                request_id, ok, result = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            with self.lock:
+                future = self.pending.pop(request_id)
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError("Database service connection closed"))
+
+    def close(self):
+        self.connection.close()
+
+
+_clients = {}
+
+def connect_database(blocking=True):
+    """DatabaseClient when DATABASE_SERVICE_ADDRESS is configured, otherwise a direct DatabaseManager.
+
+    Clients are shared per process so Streamlit reruns don't open a new connection each time.
+    """
+    if CONFIG["DATABASE_SERVICE_ADDRESS"]:
+        if blocking not in _clients:
+            _clients[blocking] = DatabaseClient(blocking=blocking)
+        return _clients[blocking]
+    return DatabaseManager()
+
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the single-writer database service")
+    parser.add_argument("--address", default=CONFIG["DATABASE_SERVICE_ADDRESS"] or "localhost:6543",
+                        help="host:port to listen on")
+    parser.add_argument("--database", default=CONFIG["DATABASE_NAME"])
+    args = parser.parse_args()
+    DatabaseService(args.database, args.address).serve_forever()
@@ -0,0 +1,178 @@
+# db_service_stress.py
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+from database_handler import DatabaseManager
+from db_service import DatabaseClient, DatabaseService
+
+AUTHKEY = b"stress-test"
+
+
+def seed_database(database_name, num_employees, dim=512):
+    db = DatabaseManager(database_name)
+    rng = np.random.default_rng(0)
+    photo = Image.new("RGB", (32, 32))
+    for index in range(num_employees):
+        embedding = rng.standard_normal(dim).astype(np.float32)
+        db.save_employee(f"stress{index:04d}", f"Stress {index}", embedding / np.linalg.norm(embedding),
+                         photo, allow_duplicate=True)
+
+
+def run_service(database_name, address_queue, stop_event):
+    service = DatabaseService(database_name, "localhost:0", AUTHKEY).start()
+    address_queue.put(f"{service.address[0]}:{service.address[1]}")
+    stop_event.wait()
+    service.stop()
+    print(f"Service committed {service.writes} writes in {service.batches} batches")
+
+
+def run_camera(camera, address, database_name, employees, seconds, results):
+    """Simulated recognition loop: adapts embeddings every frame and logs entries/exits"""
+    client = DatabaseClient(address, AUTHKEY, database_name)
+    institute_ids = list(employees)
+    rng = random.Random(camera)
+    futures, sent, latencies = [], {}, []
+    counter = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        counter += 1
+        institute_id = rng.choice(institute_ids)
+        embedding = employees[institute_id]['encoding'].copy()
+        embedding[0] = counter  # Lets the checker tell which update landed last
+        futures.append(client.update_employee_embedding(institute_id, embedding))
+        sent[institute_id] = counter
+        if counter % 10 == 0:
+            start = time.perf_counter()
+            method = client.log_entry if counter % 20 == 0 else client.log_exit
+            method(employees[institute_id]['id'], employees[institute_id]['name']).result()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    errors = 0
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            errors += 1
+            print(f"Camera {camera} write failed: {e}")
+    client.close()
+    results.put(('camera', camera, len(futures), errors, sent, latencies))
+
+
+def run_admin(address, database_name, deletable_ids, seconds, results):
+    """Simulated admin session: reads reports, deletes logs and removes employees while cameras write"""
+    client = DatabaseClient(address, AUTHKEY, database_name, blocking=True)
+    rng = random.Random(99)
+    deleted, operations, errors = [], 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            logs = client.get_entry_logs(20)
+            client.get_employee_data()
+            if logs and rng.random() < 0.5:
+                with client.get_connection() as conn:
+                    log_id = conn.execute("SELECT MAX(id) FROM entry_logs").fetchone()[0]
+                client.delete_entry_log(log_id)
+            if deletable_ids and rng.random() < 0.05:
+                institute_id = deletable_ids.pop()
+                if client.delete_employee(institute_id):
+                    deleted.append(institute_id)
+            operations += 1
+        except Exception as e:
+            errors += 1
+            print(f"Admin operation failed: {e}")
+        time.sleep(0.01)
+    client.close()
+    results.put(('admin', deleted, operations, errors))
+
+
+def check_database(database_name, sent_counters, deleted):
+    """Every surviving employee must hold the last embedding update that was sent for them"""
+    db = DatabaseManager(database_name)
+    stored = {emp['employee_institute_id']: emp['encoding'][0] for emp in db.get_employee_data()}
+    lost = [institute_id for institute_id, counter in sent_counters.items()
+            if institute_id not in deleted and stored.get(institute_id) != counter]
+    resurrected = [institute_id for institute_id in deleted if institute_id in stored]
+
+    with db.get_connection() as conn:
+        summary_counts = conn.execute(
+            "SELECT COALESCE(SUM(entry_count), 0), COALESCE(SUM(exit_count), 0) FROM attendance_daily"
+        ).fetchone()
+        log_counts = (conn.execute("SELECT COUNT(*) FROM entry_logs").fetchone()[0],
+                      conn.execute("SELECT COUNT(*) FROM exit_logs").fetchone()[0])
+        # Cameras keep logging employees the admin is deleting; none of those rows may survive
+        orphans = sum(
+            conn.execute(f"SELECT COUNT(*) FROM {table} WHERE employee_id NOT IN (SELECT id FROM employees)").fetchone()[0]
+            for table in ("entry_logs", "exit_logs", "attendance_daily")
+        )
+    return lost, resurrected, tuple(summary_counts) == log_counts, orphans
+
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress the database service with simulated cameras and an admin session")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="db_stress_")
+    database_name = os.path.join(workdir, "stress.db")
+    try:
+        seed_database(database_name, args.employees)
+        address_queue, results = multiprocessing.Queue(), multiprocessing.Queue()
+        stop_event = multiprocessing.Event()
+        service = multiprocessing.Process(target=run_service, args=(database_name, address_queue, stop_event))
+        service.start()
+        address = address_queue.get(timeout=30)
+
+        # Each camera owns its own employees so "last update sent" is well defined;
+        # the admin deletes some of them while the cameras keep updating them.
+        employees = DatabaseManager(database_name, read_only=True).get_employee_data()
+        deletable_ids = [emp['employee_institute_id'] for emp in employees[:args.employees // 10]]
+        workers = [
+            multiprocessing.Process(target=run_camera, args=(
+                camera, address, database_name,
+                {emp['employee_institute_id']: emp for emp in employees[camera::args.cameras]},
+                args.seconds, results
+            ))
+            for camera in range(args.cameras)
+        ]
+        workers.append(multiprocessing.Process(target=run_admin, args=(address, database_name,
+                                                                       list(deletable_ids), args.seconds, results)))
+        for worker in workers:
+            worker.start()
+
+        sent_counters, deleted, writes, errors, latencies = {}, [], 0, 0, []
+        for _ in workers:
+            result = results.get(timeout=args.seconds + 60)
+            if result[0] == 'camera':
+                _, camera, camera_writes, camera_errors, sent, camera_latencies = result
+                writes += camera_writes
+                errors += camera_errors
+                sent_counters.update(sent)
+                latencies.extend(camera_latencies)
+            else:
+                _, deleted, operations, admin_errors = result
+                errors += admin_errors
+                print(f"Admin: {operations} operations, {len(deleted)} employees deleted")
+        for worker in workers:
+            worker.join()
+        stop_event.set()
+        service.join()
+
+        lost, resurrected, summaries_match, orphans = check_database(database_name, sent_counters, set(deleted))
+        print(f"{args.cameras} cameras: {writes} embedding updates in {args.seconds:.0f}s "
+              f"({writes / args.seconds:.0f}/s), log write p95 {np.percentile(latencies or [0], 95):.1f} ms")
+        print(f"Errors: {errors}, lost updates: {len(lost)}, deleted employees resurrected: {len(resurrected)}, "
+              f"summaries consistent: {summaries_match}, rows of deleted employees: {orphans}")
+        if errors or lost or resurrected or not summaries_match or orphans:
+            raise SystemExit(1)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
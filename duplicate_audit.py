@@ -0,0 +1,125 @@
+# duplicate_audit.py
+import argparse
+import csv
+import time
+import numpy as np
+from config import CONFIG
+from database_handler import DatabaseManager
+
+
+def find_duplicate_pairs(matrix, threshold, block_size=4096):
+    """Return (i, j, similarity) for every pair i < j at or above the threshold.
+
+    The similarity matrix is computed one block_size x block_size tile at a
+    time over the upper triangle, so memory stays bounded regardless of
+    gallery size.
+    """
+    n = matrix.shape[0]
+    rows, cols, scores = [], [], []
+    for i0 in range(0, n, block_size):
+        left = matrix[i0:i0 + block_size]
+        for j0 in range(i0, n, block_size):
+            similarities = left @ matrix[j0:j0 + block_size].T
+            if j0 == i0:
+                similarities[np.tril_indices_from(similarities)] = -np.inf
+            r, c = np.nonzero(similarities >= threshold)
+            rows.append(r + i0)
+            cols.append(c + j0)
+            scores.append(similarities[r, c])
+
+    if not rows:
+        return []
+    rows, cols, scores = np.concatenate(rows), np.concatenate(cols), np.concatenate(scores)
+    order = np.argsort(scores)[::-1]
+    return [(int(rows[k]), int(cols[k]), float(scores[k])) for k in order]
+
+
+class DuplicateAuditor:
+    def __init__(self, db=None, block_size=4096):
+        self.db = db or DatabaseManager()
+        self.block_size = block_size
+
+    def load_gallery(self):
+        """Load all employee embeddings into one normalized float32 matrix"""
+        with self.db.get_connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+            employees = []
+            matrix = None
+            cursor = conn.execute("SELECT id, employee_institute_id, name, encoding FROM employees")
+            while True:
+                rows = cursor.fetchmany(self.block_size)
+                if not rows:
+                    break
+                for row in rows:
+                    embedding = np.frombuffer(row['encoding'], dtype=np.float32)
+                    if matrix is None:
+                        matrix = np.empty((count, embedding.shape[0]), dtype=np.float32)
+                    matrix[len(employees)] = embedding
+                    employees.append({
+                        'id': row['id'],
+                        'employee_institute_id': row['employee_institute_id'],
+                        'name': row['name']
+                    })
+        if matrix is None:
+            return employees, np.empty((0, 0), dtype=np.float32)
+        matrix = matrix[:len(employees)]
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        return employees, matrix
+
+    def audit(self, threshold=None, output_path=None):
+        """Report pairs of enrolled employees whose embeddings look like the same person"""
+        threshold = CONFIG["DUPLICATE_IDENTITY_THRESHOLD"] if threshold is None else threshold
+        start = time.perf_counter()
+        employees, matrix = self.load_gallery()
+        pairs = find_duplicate_pairs(matrix, threshold, self.block_size)
+        elapsed = time.perf_counter() - start
+
+        report = [
+            {
+                'employee_institute_id_1': employees[i]['employee_institute_id'],
+                'name_1': employees[i]['name'],
+                'employee_institute_id_2': employees[j]['employee_institute_id'],
+                'name_2': employees[j]['name'],
+                'similarity': round(similarity, 4)
+            }
+            for i, j, similarity in pairs
+        ]
+
+        print(f"Audited {len(employees)} employees in {elapsed:.1f}s, {len(report)} suspicious pairs at >= {threshold}")
+        for entry in report:
+            print(f"{entry['name_1']} (ID: {entry['employee_institute_id_1']}) <-> "
+                  f"{entry['name_2']} (ID: {entry['employee_institute_id_2']}): {entry['similarity']:.3f}")
+
+        if output_path:
+            with open(output_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=['employee_institute_id_1', 'name_1',
+                                                       'employee_institute_id_2', 'name_2', 'similarity'])
+                writer.writeheader()
+                writer.writerows(report)
+        return report
+
+
+def benchmark(num_employees, dim=512, threshold=0.6, block_size=4096):
+    """Time the blocked all-pairs search on a random gallery of the given size"""
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((num_employees, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    start = time.perf_counter()
+    pairs = find_duplicate_pairs(matrix, threshold, block_size)
+    print(f"{num_employees} x {dim} gallery: {len(pairs)} pairs in {time.perf_counter() - start:.1f}s")
+
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find employees who may be enrolled more than once")
+    parser.add_argument("--threshold", type=float, default=CONFIG["DUPLICATE_IDENTITY_THRESHOLD"])
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument("--output", help="Write the suspicious pairs to this CSV file")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="Time the search on N random embeddings instead of auditing the database")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, threshold=args.threshold, block_size=args.block_size)
+    else:
+        DuplicateAuditor(block_size=args.block_size).audit(args.threshold, args.output)
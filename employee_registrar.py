@@ -2,7 +2,8 @@ import cv2
 import os
 from PIL import Image
 import numpy as np
-from database_handler import DatabaseManager
+from database_handler import DuplicateIdentityError
+from db_service import connect_database
 from config import CONFIG
 from face_processor import FaceProcessor
 import time
@@ -10,9 +11,9 @@ import time
 class EmployeeRegistrar:
     def __init__(self):
         self.face_processor = FaceProcessor()
-        self.db = DatabaseManager()
+        self.db = connect_database()
     
-    def capture_face_samples(self,name1=None,institute_id=None):
+    def capture_face_samples(self,name1=None,institute_id=None,allow_duplicate=False):
         """Interactive face registration through webcam"""
         if not name1:
             employee_name = input("Enter employee name: ").strip()
@@ -47,7 +48,8 @@ class EmployeeRegistrar:
         
         if all_images:
             employee_image = Image.open(all_images[0])  # Use the first image as profile photo
-            self._register_employee(employee_institute_id, employee_name, employee_image, employee_data)
+            return self._register_employee(employee_institute_id, employee_name, employee_image, employee_data, allow_duplicate)
+        return False
     
     def capture_pose(self, cap, pose, instruction, num_images, save_path, employee_data):
         print(f"\n{instruction}")
@@ -78,10 +80,11 @@ class EmployeeRegistrar:
         
         return images_captured
     
-    def _register_employee(self, employee_institute_id, name, employee_image, employee_data):
+    def _register_employee(self, employee_institute_id, name, employee_image, employee_data, allow_duplicate=False):
         """Process captured images and save to database"""
         employee_folder = os.path.join(CONFIG["EMPLOYEE_DATA_ROOT"], employee_data)
         embeddings = []
+        poses = []
         
         for image_file in os.listdir(employee_folder):
             image_path = os.path.join(employee_folder, image_file)
@@ -89,14 +92,27 @@ class EmployeeRegistrar:
             embeds = self.face_processor.get_embeddings(image)
             if embeds:
                 embeddings.append(embeds[0])
+                # Captured images are named {employee_data}_{pose}_{n}.jpg
+                parts = os.path.splitext(image_file)[0].rsplit("_", 2)
+                poses.append(parts[1] if len(parts) == 3 else "unknown")
         
         if embeddings:
             avg_embedding = np.mean(embeddings, axis=0)
             avg_embedding /= np.linalg.norm(avg_embedding)
-            self.db.save_employee(employee_institute_id, name, avg_embedding, employee_image)
+            templates = self.face_processor.build_templates(embeddings, poses)
+            try:
+                self.db.save_employee(employee_institute_id, name, avg_embedding, employee_image, allow_duplicate, templates)
+            except DuplicateIdentityError:
+                print("Registration rejected. Re-run with allow_duplicate=True if this is a different person.")
+                return False
+            except ValueError:
+                print("Failed to generate usable embeddings. Please try registration again.")
+                return False
             print(f"Successfully registered {name}")
+            return True
         else:
             print("Failed to generate embeddings. Please try registration again.")
+            return False
 
 # Usage
 if __name__ == "__main__":
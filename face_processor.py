@@ -2,18 +2,89 @@
 from config import CONFIG
 import cv2
 import numpy as np
+import onnxruntime
 from insightface.app import FaceAnalysis
 
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+}
+
+EXECUTION_MODES = {
+    "sequential": onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": onnxruntime.ExecutionMode.ORT_PARALLEL
+}
+
+def get_inference_profile(profile=None):
+    """Resolve a profile name or partial dict against the default inference profile"""
+    if profile is None:
+        profile = CONFIG["INFERENCE_PROFILE"]
+    if isinstance(profile, str):
+        profile = CONFIG["INFERENCE_PROFILES"][profile]
+    return {**CONFIG["INFERENCE_PROFILES"]["default"], **profile}
+
 class FaceProcessor:
-    def __init__(self):
-        self.app = FaceAnalysis(
-            name=CONFIG["FACE_MODEL_NAME"],
-            providers=['CUDAExecutionProvider', 'CPUExecutionProvider']
-        )
-        self.app.prepare(ctx_id=0, det_size=(640, 640))
+    def __init__(self, profile=None, app=None):
+        self.profile = get_inference_profile(profile)
+        if app is None:
+            self.app = FaceAnalysis(
+                name=CONFIG["FACE_MODEL_NAME"],
+                providers=self.profile["providers"]
+            )
+            self._configure_sessions()
+            self.app.prepare(ctx_id=self.profile["ctx_id"], det_size=tuple(self.profile["det_size"]))
+            self.warmup(self.profile["warmup_runs"])
+        else:
+            # Any object with a FaceAnalysis-style get(image), e.g. a recorded-session stub
+            self.app = app
         self.embedding_history_size = 10
         self.original_weight = 0.95  # Weight given to the original embedding
     
+    def _configure_sessions(self):
+        """Recreate each model's ONNX Runtime session with the profile's session options.
+
+        FaceAnalysis only forwards the provider list to ONNX Runtime, so thread
+        counts and graph optimizations have to be applied by swapping sessions.
+        Profiles that only use ONNX Runtime's defaults keep the sessions
+        FaceAnalysis already loaded.
+        """
+        defaults = onnxruntime.SessionOptions()
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.profile["intra_op_threads"]
+        options.inter_op_num_threads = self.profile["inter_op_threads"]
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[self.profile["graph_optimization_level"]]
+        options.execution_mode = EXECUTION_MODES[self.profile["execution_mode"]]
+        if all(getattr(options, name) == getattr(defaults, name) for name in
+               ("intra_op_num_threads", "inter_op_num_threads", "graph_optimization_level", "execution_mode")):
+            return
+        for model in self.app.models.values():
+            model.session = onnxruntime.InferenceSession(
+                model.model_file, sess_options=options, providers=self.profile["providers"]
+            )
+
+    def dummy_inputs(self, model):
+        """Zero-filled input tensor matching a model's input, using det_size for dynamic image dimensions"""
+        model_input = model.session.get_inputs()[0]
+        det_size = tuple(self.profile["det_size"])
+        shape = []
+        for axis, dim in enumerate(model_input.shape):
+            if isinstance(dim, int):
+                shape.append(dim)
+            elif axis >= 2:
+                shape.append(det_size[::-1][axis - 2])
+            else:
+                shape.append(1)
+        return {model_input.name: np.zeros(shape, dtype=np.float32)}
+
+    def warmup(self, runs=1):
+        """Run every model on dummy inputs so the first real frames don't pay for lazy initialization"""
+        for _ in range(runs):
+            for model in self.app.models.values():
+                model.session.run(None, self.dummy_inputs(model))
+            self.app.get(np.zeros((*tuple(self.profile["det_size"])[::-1], 3), dtype=np.uint8))
+
     def get_embeddings(self, image):
         """Extract face embeddings from an image"""
         faces = self.app.get(image)
@@ -36,24 +107,63 @@ class FaceProcessor:
         return [face for face in faces 
             if face.det_score > CONFIG["FACE_DETECTION_CONFIDENCE"]]
 
-    def update_embedding(self, employee):
-        original_embedding = employee['original_encoding']
+    def build_templates(self, embeddings, labels=None, max_templates=None):
+        """Group embeddings into at most max_templates normalized (label, template) pairs.
+
+        Embeddings sharing a label (e.g. a registration pose) are averaged. If
+        that still leaves too many groups, the most distinct groups are kept as
+        seeds and the rest are merged into their nearest seed.
+        """
+        max_templates = max_templates or CONFIG["MAX_TEMPLATES_PER_EMPLOYEE"]
+        labels = labels or [f"sample_{i + 1}" for i in range(len(embeddings))]
+
+        groups = {}
+        for label, embedding in zip(labels, embeddings):
+            groups.setdefault(label, []).append(embedding / np.linalg.norm(embedding))
+        names = list(groups)
+        means = np.array([np.mean(groups[name], axis=0) for name in names], dtype=np.float32)
+        means /= np.linalg.norm(means, axis=1, keepdims=True)
+
+        if len(names) > max_templates:
+            seeds = [0]
+            while len(seeds) < max_templates:
+                closest = np.max(means @ means[seeds].T, axis=1)
+                candidate = int(np.argmin(closest))
+                if candidate in seeds:
+                    break  # Every remaining group duplicates a seed
+                seeds.append(candidate)
+            assignment = np.argmax(means @ means[seeds].T, axis=1)
+            merged = []
+            for k, seed in enumerate(seeds):
+                members = means[assignment == k]
+                if len(members) == 0:
+                    continue
+                template = members.mean(axis=0)
+                merged.append((names[seed], template / np.linalg.norm(template)))
+            return merged
+
+        return list(zip(names, means))
+
+    def update_embedding(self, employee, template_index=0):
+        """Adapt the given template of an employee towards their current embedding"""
+        original_embedding = employee['original_templates'][template_index]
         new_embedding = employee['current_embedding']
         
-        if 'embedding_history' not in employee:
-            employee['embedding_history'] = [original_embedding]
+        if 'template_histories' not in employee:
+            employee['template_histories'] = [[template.copy()] for template in employee['original_templates']]
+        history = employee['template_histories'][template_index]
         
-        employee['embedding_history'].append(new_embedding)
-        if len(employee['embedding_history']) > self.embedding_history_size:
-            employee['embedding_history'] = employee['embedding_history'][-self.embedding_history_size:]
+        history.append(new_embedding)
+        if len(history) > self.embedding_history_size:
+            del history[:-self.embedding_history_size]
         
         # Compute weighted average
-        recent_embeddings = np.array(employee['embedding_history'])
+        recent_embeddings = np.array(history)
         weighted_avg = (self.original_weight * original_embedding + 
                         (1 - self.original_weight) * np.mean(recent_embeddings, axis=0))
         
         return weighted_avg / np.linalg.norm(weighted_avg)  # Normalize the updated embedding
 
     def reset_embedding(self, employee):
-        employee['encoding'] = employee['original_encoding']
-        employee['embedding_history'] = [employee['original_encoding']]
\ No newline at end of file
+        employee['templates'][:] = employee['original_templates']
+        employee['template_histories'] = [[template.copy()] for template in employee['original_templates']]
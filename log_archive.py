@@ -0,0 +1,218 @@
+# log_archive.py
+import argparse
+import csv
+import datetime
+import heapq
+import json
+import os
+import sqlite3
+from config import CONFIG
+from database_handler import DatabaseManager
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXPORT_COLUMNS = ["log_id", "event_type", "employee_id", "employee_institute_id", "employee_name", "event_time"]
+LOG_TABLES = [("entry", "entry_logs", "entry_time"), ("exit", "exit_logs", "exit_time")]
+
+
+def _month_starts(start_date, end_date):
+    month = datetime.date(start_date.year, start_date.month, 1)
+    while month <= end_date:
+        yield month
+        month = (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+class LogArchiver:
+    def __init__(self, db=None):
+        self.db = db or DatabaseManager()
+
+    def _create_archive_tables(self, conn, schema):
+        for _, table, time_column in LOG_TABLES:
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {schema}.{table} (
+                    id INTEGER PRIMARY KEY,
+                    employee_id INTEGER,
+                    employee_name TEXT,
+                    {time_column} DATETIME
+                )
+            ''')
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_time ON {table} ({time_column})"
+            )
+
+    def _iter_table(self, schema, archive_path, event_type, table, time_column, lower, upper, batch_size):
+        """Page through one log table in (time, id) order.
+
+        Every page is its own short query on a fresh connection, so an export
+        never holds a read transaction open while the recognition loop writes.
+        """
+        after = (lower, -1)
+        while True:
+            with self.db.get_connection() as conn:
+                if schema == "archive":
+                    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                rows = conn.execute(
+                    f"SELECT logs.id, '{event_type}', logs.employee_id, employees.employee_institute_id, "
+                    f"logs.employee_name, logs.{time_column} FROM {schema}.{table} AS logs "
+                    f"LEFT JOIN main.employees AS employees ON logs.employee_id = employees.id "
+                    f"WHERE logs.{time_column} < ? AND (logs.{time_column}, logs.id) > (?, ?) "
+                    f"ORDER BY logs.{time_column}, logs.id LIMIT ?",
+                    (upper, after[0], after[1], batch_size)
+                ).fetchall()
+            for row in rows:
+                yield tuple(row)
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1][5], rows[-1][0])
+
+    def iter_events(self, start_date, end_date, batch_size=1000):
+        """Yield entry/exit events between two dates (inclusive), oldest first, from the live tables and archives"""
+        for month in _month_starts(start_date, end_date):
+            next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+            lower = max(month, start_date).isoformat()
+            upper = min(next_month, end_date + datetime.timedelta(days=1)).isoformat()
+            archive_path = self.db.get_archive_path(month)
+
+            schemas = ["main"]
+            if os.path.exists(archive_path):
+                schemas.append("archive")
+            sources = [
+                self._iter_table(schema, archive_path, event_type, table, time_column, lower, upper, batch_size)
+                for schema in schemas
+                for event_type, table, time_column in LOG_TABLES
+            ]
+            yield from heapq.merge(*sources, key=lambda event: (event[5], event[1]))
+
+    def export(self, start_date, end_date, output_path, fmt="csv", batch_size=1000):
+        """Stream events for a date range to CSV, JSONL or Parquet without loading them into memory"""
+        events = self.iter_events(start_date, end_date, batch_size)
+        count = 0
+
+        if fmt == "csv":
+            with open(output_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_COLUMNS)
+                for event in events:
+                    writer.writerow(event)
+                    count += 1
+        elif fmt == "jsonl":
+            with open(output_path, "w") as f:
+                for event in events:
+                    f.write(json.dumps(dict(zip(EXPORT_COLUMNS, event)), default=str) + "\n")
+                    count += 1
+        elif fmt == "parquet":
+            if pa is None:
+                raise RuntimeError("Parquet export requires pyarrow to be installed")
+            schema = pa.schema([
+                ("log_id", pa.int64()),
+                ("event_type", pa.string()),
+                ("employee_id", pa.int64()),
+                ("employee_institute_id", pa.string()),
+                ("employee_name", pa.string()),
+                ("event_time", pa.string())
+            ])
+            with pq.ParquetWriter(output_path, schema) as writer:
+                batch = []
+                for event in events:
+                    batch.append(event)
+                    if len(batch) >= batch_size:
+                        writer.write_table(pa.Table.from_pylist([dict(zip(EXPORT_COLUMNS, e)) for e in batch], schema))
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    writer.write_table(pa.Table.from_pylist([dict(zip(EXPORT_COLUMNS, e)) for e in batch], schema))
+                    count += len(batch)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        print(f"Exported {count} log events to {output_path}")
+        return count
+
+    def archive_older_than(self, days=None, batch_size=None, vacuum=False):
+        """Move entry/exit logs older than the retention period into monthly archive databases"""
+        days = CONFIG["LOG_RETENTION_DAYS"] if days is None else days
+        batch_size = batch_size or CONFIG["LOG_ARCHIVE_BATCH_SIZE"]
+        cutoff = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+        moved = 0
+
+        for _, table, time_column in LOG_TABLES:
+            while True:
+                with self.db.get_connection() as conn:
+                    oldest = conn.execute(
+                        f"SELECT MIN({time_column}) FROM {table} WHERE {time_column} < ?", (cutoff,)
+                    ).fetchone()[0]
+                if oldest is None:
+                    break
+
+                month = datetime.date.fromisoformat(str(oldest)[:10]).replace(day=1)
+                next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+                upper = min(next_month.isoformat(), cutoff)
+                moved += self._move_month(table, time_column, month, month.isoformat(), upper, batch_size)
+
+        if vacuum:
+            with self.db.get_connection() as conn:
+                conn.execute("VACUUM")
+
+        print(f"Archived {moved} log events older than {cutoff}")
+        return moved
+
+    def _move_month(self, table, time_column, month, lower, upper, batch_size):
+        archive_path = self.db.get_archive_path(month)
+        moved = 0
+        with self.db.get_connection() as conn:
+            conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+            self._create_archive_tables(conn, "archive")
+            conn.commit()
+
+            batch_filter = (
+                f"SELECT id FROM main.{table} WHERE {time_column} >= ? AND {time_column} < ? "
+                f"ORDER BY {time_column} LIMIT ?"
+            )
+            params = (lower, upper, batch_size)
+            while True:
+                try:
+                    cursor = conn.execute(
+                        f"INSERT OR REPLACE INTO archive.{table} (id, employee_id, employee_name, {time_column}) "
+                        f"SELECT id, employee_id, employee_name, {time_column} FROM main.{table} "
+                        f"WHERE id IN ({batch_filter})",
+                        params
+                    )
+                    if cursor.rowcount == 0:
+                        conn.rollback()
+                        break
+                    conn.execute(f"DELETE FROM main.{table} WHERE id IN ({batch_filter})", params)
+                    conn.commit()
+                    moved += cursor.rowcount
+                except sqlite3.Error as e:
+                    print(f"Archiving {table} for {month.strftime('%Y-%m')} failed: {str(e)}")
+                    conn.rollback()
+                    raise
+        return moved
+
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and archive entry/exit logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Stream logs for a date range to a file")
+    export_parser.add_argument("start", type=datetime.date.fromisoformat, help="First day (YYYY-MM-DD)")
+    export_parser.add_argument("end", type=datetime.date.fromisoformat, help="Last day (YYYY-MM-DD)")
+    export_parser.add_argument("output", help="Output file path")
+    export_parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="csv")
+
+    archive_parser = subparsers.add_parser("archive", help="Move old logs into monthly archive databases")
+    archive_parser.add_argument("--days", type=int, default=CONFIG["LOG_RETENTION_DAYS"])
+    archive_parser.add_argument("--batch-size", type=int, default=CONFIG["LOG_ARCHIVE_BATCH_SIZE"])
+    archive_parser.add_argument("--vacuum", action="store_true", help="Reclaim free space in the main database afterwards")
+
+    args = parser.parse_args()
+    archiver = LogArchiver()
+    if args.command == "export":
+        archiver.export(args.start, args.end, args.output, args.format)
+    else:
+        archiver.archive_older_than(args.days, args.batch_size, args.vacuum)
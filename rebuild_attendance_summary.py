@@ -0,0 +1,13 @@
+# rebuild_attendance_summary.py
+from concurrent.futures import Future
+from db_service import connect_database
+
+# Usage: run whenever the attendance_daily table needs to be recomputed from
+# the raw entry/exit logs. With DATABASE_SERVICE_ADDRESS set, the rebuild is
+# executed by the database service like every other write.
+if __name__ == "__main__":
+    db = connect_database(blocking=False)
+    result = db.rebuild_daily_summaries()
+    if isinstance(result, Future):
+        # Wait without the client's write timeout; a full rebuild can take a while
+        print(f"Rebuilt {result.result()} daily attendance summaries")
@@ -1,23 +1,34 @@
 # recognition_app.py
+import functools
 import cv2
 import numpy as np
 from config import CONFIG
 from face_processor import FaceProcessor
-from database_handler import DatabaseManager
+from db_service import connect_database
 import time
-import winsound
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 
+try:
+    import winsound
+except ImportError:
+    winsound = None  # Not available outside Windows, e.g. when replaying sessions on a build server
+
 def play_success():
     """Play a success sound (high frequency beep)."""
+    if winsound is None:
+        return
     frequency = 1000  # Frequency in Hertz
     duration = 500    # Duration in milliseconds (500 ms = 0.5 seconds)
     winsound.Beep(frequency, duration)
 
 class RecognitionApp:
-    def __init__(self):
-        self.face_processor = FaceProcessor()
-        self.db = DatabaseManager()
+    def __init__(self, face_processor=None, db=None, clock=datetime.now, matching=None):
+        self.face_processor = face_processor or FaceProcessor()
+        self.db = db or connect_database(blocking=False)
+        self.clock = clock  # Replays substitute the recorded time
+        self.matching = matching or CONFIG["GALLERY_MATCHING"]
+        self.last_face_count = 0
         self._load_known_embeddings()
         self.current_users = set()
         self.last_log_times = {}
@@ -25,52 +36,104 @@ class RecognitionApp:
         self.log_cooldown = timedelta(minutes=1)  # 1 minute cooldown
 
     def _load_known_embeddings(self):
-        self.known_embeddings = {
-            employee['employee_institute_id']: {
-                **employee,
-                'original_encoding': employee['encoding'].copy(),
-                'embedding_history': [employee['encoding']]
-            } 
-            for employee in self.db.get_employee_data()
-        }
-
-    def _load_known_embeddings(self):
-        self.known_embeddings = {
-            employee['employee_institute_id']: {
+        """Build one normalized template matrix for the whole gallery.
+
+        Each employee owns a contiguous block of rows (their pose templates, or
+        their mean embedding when matching is "mean" or no templates exist), so
+        the best score per employee is a single maximum.reduceat over a row of
+        similarities.
+        """
+        employees = self.db.get_employee_data()
+        templates = self.db.get_employee_templates() if self.matching == "templates" else {}
+
+        rows, starts, template_ids = [], [], []
+        for employee in employees:
+            employee_templates = templates.get(employee['id'])
+            starts.append(len(rows))
+            if employee_templates:
+                rows.extend(template['embedding'] for template in employee_templates)
+                template_ids.append([template['id'] for template in employee_templates])
+            else:
+                rows.append(employee['encoding'])
+                template_ids.append([None])
+
+        if rows:
+            self.gallery = np.array(rows, dtype=np.float32)
+            self.gallery /= np.linalg.norm(self.gallery, axis=1, keepdims=True)
+        else:
+            self.gallery = np.empty((0, 0), dtype=np.float32)
+        self.gallery_starts = np.array(starts, dtype=np.intp)
+        self.gallery_employees = [employee['employee_institute_id'] for employee in employees]
+
+        self.known_embeddings = {}
+        for index, employee in enumerate(employees):
+            start = starts[index]
+            end = starts[index + 1] if index + 1 < len(starts) else len(rows)
+            employee_templates = self.gallery[start:end]  # View, so updates are visible to matching
+            self.known_embeddings[employee['employee_institute_id']] = {
                 **employee,
-                'original_encoding': employee['encoding'].copy(),
-                'embedding_history': [employee['encoding']]
-            } 
-            for employee in self.db.get_employee_data()
-        }
+                'templates': employee_templates,
+                'template_ids': template_ids[index],
+                'original_templates': employee_templates.copy(),
+                'template_histories': [[template.copy()] for template in employee_templates]
+            }
 
     def recognize_employees(self, frame):
         faces = self.face_processor.detect_faces(frame)
+        self.last_face_count = len(faces)
         recognized_employees = []
-
-        for face in faces:
-            current_embedding = face.embedding
-            for i in range(1):
-                best_match = max(
-                    self.known_embeddings.values(),
-                    key=lambda emp: self.face_processor.calculate_similarity(current_embedding, emp['encoding']),
-                    default=None
-                )
-
-            if best_match:
-                similarity = self.face_processor.calculate_similarity(current_embedding, best_match['encoding'])
-                best_match['confidence'] = similarity
-                best_match['bbox'] = face.bbox
-                best_match['current_embedding'] = current_embedding
-
-                if similarity > CONFIG["DETECTION_THRESHOLD"]:
-                    updated_embedding = self.face_processor.update_embedding(best_match)
-                    best_match['encoding'] = updated_embedding
-                    self.db.update_employee_embedding(best_match['employee_institute_id'], updated_embedding)
-                    recognized_employees.append(best_match)
+        if not faces or not self.known_embeddings:
+            return recognized_employees
+
+        queries = np.array([face.embedding for face in faces], dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = queries @ self.gallery.T
+        employee_scores = np.maximum.reduceat(scores, self.gallery_starts, axis=1)
+
+        for face_index, face in enumerate(faces):
+            employee_index = int(np.argmax(employee_scores[face_index]))
+            best_match = self.known_embeddings[self.gallery_employees[employee_index]]
+            similarity = float(employee_scores[face_index, employee_index])
+            start = self.gallery_starts[employee_index]
+            template_index = int(np.argmax(scores[face_index, start:start + len(best_match['templates'])]))
+
+            best_match['confidence'] = similarity
+            best_match['bbox'] = face.bbox
+            best_match['current_embedding'] = face.embedding
+
+            if similarity > CONFIG["DETECTION_THRESHOLD"]:
+                updated_embedding = self.face_processor.update_embedding(best_match, template_index)
+                best_match['templates'][template_index] = updated_embedding
+                template_id = best_match['template_ids'][template_index]
+                if template_id is None:
+                    self._write("update_employee_embedding", best_match['employee_institute_id'], updated_embedding)
+                else:
+                    self._write("update_employee_template", template_id, updated_embedding)
+                recognized_employees.append(best_match)
 
         return recognized_employees
 
+    def _write(self, method, *args):
+        """Call a database write without stopping the recognition loop if it fails; False if it was not sent.
+
+        With the database service the write returns a Future; its failure is
+        only known once the batch commits, so it is reported from a callback.
+        """
+        try:
+            result = getattr(self.db, method)(*args)
+        except (ConnectionError, OSError) as e:
+            print(f"Database write {method} failed: {str(e)}")
+            return False
+        if isinstance(result, Future):
+            result.add_done_callback(functools.partial(self._report_write_failure, method))
+        return True
+
+    @staticmethod
+    def _report_write_failure(method, future):
+        error = future.exception()
+        if error is not None:
+            print(f"Database write {method} failed: {str(error)}")
+
     def determine_log_type(self, employee_id):
         last_entry = self.db.get_last_entry(employee_id)
         last_exit = self.db.get_last_exit(employee_id)
@@ -80,21 +143,20 @@ class RecognitionApp:
         return "exit" if last_entry and (not last_exit or last_entry > last_exit) else "entry"
 
     def log_access(self, employee_id, employee_name, log_type):
-        current_time = datetime.now()
+        current_time = self.clock()
         last_log_time = self.last_log_times.get(employee_id)
 
         if last_log_time and (current_time - last_log_time) < self.log_cooldown:
             print(f"Skipped logging for {employee_name} (last log was less than 1 minute ago)")
-            return
+            return False
 
-        if log_type == "entry":
-            self.db.log_entry(employee_id, employee_name)
-        else:
-            self.db.log_exit(employee_id, employee_name)
+        if not self._write("log_entry" if log_type == "entry" else "log_exit", employee_id, employee_name, current_time):
+            return False
 
         self.last_log_times[employee_id] = current_time
         print(f"{log_type.capitalize()} logged for {employee_name}")
         play_success()
+        return True
 
     def display_employee_info(self, frame, employee):
         bbox = employee['bbox'].astype(int)
@@ -104,25 +166,32 @@ class RecognitionApp:
         cv2.putText(frame, f"Conf: {employee['confidence']:.2f}", (bbox[0], bbox[3] + 20),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
-    def run(self):
-        cap = cv2.VideoCapture(0)
+    def process_frame(self, frame):
+        """Recognize and log everyone in one frame; returns the recognized employees and the logs written"""
+        recognized_employees = self.recognize_employees(frame)
+        log_events = []
+
+        for employee in recognized_employees:
+            self.display_employee_info(frame, employee)
+            if employee['id'] not in self.current_users:
+                self.current_users.add(employee['id'])
+                log_type = self.determine_log_type(employee['id'])
+                if self.log_access(employee['id'], employee['name'], log_type):
+                    log_events.append((employee['employee_institute_id'], log_type))
+
+        # Remove users who are no longer in the frame
+        current_ids = set(emp['id'] for emp in recognized_employees)
+        self.current_users = self.current_users.intersection(current_ids)
+        return recognized_employees, log_events
+
+    def run(self, cap=None):
+        cap = cap or cv2.VideoCapture(0)
         while True:
             ret, frame = cap.read()
             if not ret:
                 break
 
-            recognized_employees = self.recognize_employees(frame)
-
-            for employee in recognized_employees:
-                self.display_employee_info(frame, employee)
-                if employee['id'] not in self.current_users:
-                    self.current_users.add(employee['id'])
-                    log_type = self.determine_log_type(employee['id'])
-                    self.log_access(employee['id'], employee['name'], log_type)
-
-            # Remove users who are no longer in the frame
-            current_ids = set(emp['id'] for emp in recognized_employees)
-            self.current_users = self.current_users.intersection(current_ids)
+            self.process_frame(frame)
 
             cv2.imshow('Face Recognition', frame)
 
@@ -0,0 +1,309 @@
+# session_replay.py
+import argparse
+import datetime
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import time
+import cv2
+import numpy as np
+from config import CONFIG
+from database_handler import DatabaseManager
+from face_processor import FaceProcessor
+from recognition_app import RecognitionApp
+
+# A recording is a stream of pickled records, one per frame:
+#   {'t': seconds since start, 'shape': frame shape,
+#    'frame': JPEG bytes or None, 'faces': [{'bbox', 'det_score', 'embedding'}] or None}
+# The first record is a header: {'mode': 'frames' | 'detections', 'started_at': ISO timestamp}
+
+
+class RecordedFace:
+    """Stand-in for an insightface Face built from a recorded detection"""
+    def __init__(self, bbox, det_score, embedding):
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.det_score = float(det_score)
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+
+
+class SessionRecorder:
+    def __init__(self, path, mode="frames", jpeg_quality=90):
+        if mode not in ("frames", "detections"):
+            raise ValueError(f"Unknown recording mode: {mode}")
+        self.mode = mode
+        self.jpeg_quality = jpeg_quality
+        self.start = time.perf_counter()
+        self.file = open(path, "wb")
+        pickle.dump({'mode': mode, 'started_at': datetime.datetime.now().isoformat()}, self.file)
+
+    def write(self, shape, frame=None, faces=None):
+        record = {'t': time.perf_counter() - self.start, 'shape': shape, 'frame': None, 'faces': None}
+        if frame is not None:
+            _, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            record['frame'] = encoded.tobytes()
+        if faces is not None:
+            record['faces'] = [
+                {
+                    'bbox': np.asarray(face.bbox, dtype=np.float32),
+                    'det_score': float(face.det_score),
+                    'embedding': np.asarray(face.embedding, dtype=np.float32)
+                }
+                for face in faces
+            ]
+        pickle.dump(record, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        self.file.close()
+
+
+class RecordingCapture:
+    """Wraps a cv2.VideoCapture and records every frame it returns"""
+    def __init__(self, cap, recorder):
+        self.cap = cap
+        self.recorder = recorder
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            self.recorder.write(frame.shape, frame=frame)
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+        self.recorder.close()
+
+
+class RecordingFaceAnalysis:
+    """Wraps a FaceAnalysis app and records the faces it returns for every frame"""
+    def __init__(self, app, recorder):
+        self.app = app
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.app, name)
+
+    def get(self, image):
+        faces = self.app.get(image)
+        self.recorder.write(image.shape, faces=faces)
+        return faces
+
+
+def read_recording(path):
+    """Return the recording header and an iterator over its frame records"""
+    f = open(path, "rb")
+    header = pickle.load(f)
+
+    def records():
+        with f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    return header, records()
+
+
+class ReplayFaceAnalysis:
+    """Stub model that returns the recorded detections instead of running inference"""
+    def __init__(self):
+        self.faces = []
+
+    def get(self, image):
+        return self.faces
+
+
+class SessionReplayer:
+    def __init__(self, path, database_name=None, profile=None, realtime=False, matching=None):
+        self.path = path
+        self.realtime = realtime
+        self.header, self.records = read_recording(path)
+        self.recorded_start = datetime.datetime.fromisoformat(self.header['started_at'])
+        self.current_time = self.recorded_start
+
+        # Replays adapt embeddings and write logs, so they run against a scratch copy of the database
+        self.scratch_dir = tempfile.mkdtemp(prefix="replay_")
+        scratch_db = os.path.join(self.scratch_dir, "replay.db")
+        # The backup API gives a consistent snapshot even while the live database is being written
+        source = sqlite3.connect(database_name or CONFIG["DATABASE_NAME"])
+        target = sqlite3.connect(scratch_db)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.db = DatabaseManager(scratch_db)
+
+        if self.header['mode'] == 'detections':
+            self.stub = ReplayFaceAnalysis()
+            face_processor = FaceProcessor(profile, app=self.stub)
+        else:
+            self.stub = None
+            face_processor = FaceProcessor(profile)
+        self.app = RecognitionApp(face_processor, self.db, clock=lambda: self.current_time, matching=matching)
+
+    def _frame(self, record):
+        if record['frame'] is not None:
+            return cv2.imdecode(np.frombuffer(record['frame'], dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.stub.faces = [RecordedFace(**face) for face in record['faces']]
+        return np.zeros(record['shape'], dtype=np.uint8)
+
+    def run(self):
+        """Feed every recorded frame through recognition and logging, returning the per-frame report"""
+        frames = []
+        wall_start = time.perf_counter()
+        try:
+            for index, record in enumerate(self.records):
+                if self.realtime:
+                    delay = record['t'] - (time.perf_counter() - wall_start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                frame = self._frame(record)
+                self.current_time = self.recorded_start + datetime.timedelta(seconds=record['t'])
+                start = time.perf_counter()
+                recognized, log_events = self.app.process_frame(frame)
+                latency = (time.perf_counter() - start) * 1000
+
+                frames.append({
+                    'index': index,
+                    't': round(record['t'], 4),
+                    'latency_ms': round(latency, 3),
+                    'faces': self.app.last_face_count,
+                    'recognitions': [
+                        [employee['employee_institute_id'], round(float(employee['confidence']), 4)]
+                        for employee in recognized
+                    ],
+                    'log_events': [list(event) for event in log_events]
+                })
+        finally:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+        return {
+            'recording': self.path,
+            'mode': self.header['mode'],
+            'matching': self.app.matching,
+            'summary': summarize(frames),
+            'frames': frames
+        }
+
+
+def time_to_first_recognition(frames):
+    """Seconds from the first frame of each run of frames with faces to its first recognition.
+
+    Returns the delays and the number of runs in which nobody was recognized.
+    """
+    delays, unrecognized = [], 0
+    episode_start, recognized = None, False
+    for frame in frames:
+        if frame.get('faces', len(frame['recognitions'])):
+            if episode_start is None:
+                episode_start, recognized = frame['t'], False
+            if frame['recognitions'] and not recognized:
+                delays.append(frame['t'] - episode_start)
+                recognized = True
+        else:
+            if episode_start is not None and not recognized:
+                unrecognized += 1
+            episode_start = None
+    if episode_start is not None and not recognized:
+        unrecognized += 1
+    return delays, unrecognized
+
+
+def summarize(frames):
+    latencies = [frame['latency_ms'] for frame in frames] or [0.0]
+    delays, unrecognized = time_to_first_recognition(frames)
+    return {
+        'frames': len(frames),
+        'latency_median_ms': round(float(np.median(latencies)), 3),
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'recognitions': sum(len(frame['recognitions']) for frame in frames),
+        'log_events': sum(len(frame['log_events']) for frame in frames),
+        'time_to_first_recognition_median_s': round(float(np.median(delays)), 3) if delays else None,
+        'time_to_first_recognition_mean_s': round(float(np.mean(delays)), 3) if delays else None,
+        'unrecognized_episodes': unrecognized
+    }
+
+
+def compare_reports(baseline, report):
+    """Print latency changes and every frame whose recognitions or log events differ; returns the mismatch count"""
+    for key in report['summary']:
+        print(f"{key:<36} baseline {str(baseline['summary'].get(key)):>10}   current {str(report['summary'][key]):>10}")
+
+    mismatches = 0
+    for old, new in zip(baseline['frames'], report['frames']):
+        old_ids = [recognition[0] for recognition in old['recognitions']]
+        new_ids = [recognition[0] for recognition in new['recognitions']]
+        if old_ids != new_ids or old['log_events'] != new['log_events']:
+            mismatches += 1
+            print(f"frame {new['index']}: recognitions {old_ids} -> {new_ids}, "
+                  f"logs {old['log_events']} -> {new['log_events']}")
+    if len(baseline['frames']) != len(report['frames']):
+        mismatches += 1
+        print(f"frame count {len(baseline['frames'])} -> {len(report['frames'])}")
+    print(f"{mismatches} differing frames")
+    return mismatches
+
+
+def record_session(path, mode, profile=None):
+    """Run the live recognition loop on the webcam while recording it"""
+    recorder = SessionRecorder(path, mode)
+    app = RecognitionApp(FaceProcessor(profile))
+    if mode == "detections":
+        app.face_processor.app = RecordingFaceAnalysis(app.face_processor.app, recorder)
+        try:
+            app.run()
+        finally:
+            recorder.close()
+    else:
+        app.run(RecordingCapture(cv2.VideoCapture(0), recorder))
+
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record live recognition sessions and replay them offline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record a live webcam session")
+    record_parser.add_argument("output", help="Recording file to write")
+    record_parser.add_argument("--mode", choices=["frames", "detections"], default="frames",
+                               help="Store JPEG frames, or only detections and embeddings")
+    record_parser.add_argument("--profile", help="Inference profile from CONFIG['INFERENCE_PROFILES']")
+
+    replay_parser = subparsers.add_parser("replay", help="Replay a recording and write a report")
+    replay_parser.add_argument("recording", help="Recording file to replay")
+    replay_parser.add_argument("--report", help="Write the JSON report to this file")
+    replay_parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    replay_parser.add_argument("--database", help="Database to copy as the starting gallery (default: DATABASE_NAME)")
+    replay_parser.add_argument("--profile", help="Inference profile for frame recordings")
+    replay_parser.add_argument("--realtime", action="store_true", help="Pace frames at the recorded speed")
+    replay_parser.add_argument("--matching", choices=["templates", "mean"],
+                               help="Gallery matching strategy (default: GALLERY_MATCHING)")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two replay reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("report")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_session(args.output, args.mode, args.profile)
+    elif args.command == "replay":
+        report = SessionReplayer(args.recording, args.database, args.profile, args.realtime, args.matching).run()
+        print(json.dumps(report['summary'], indent=2))
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump(report, f, indent=1)
+        if args.baseline:
+            with open(args.baseline) as f:
+                if compare_reports(json.load(f), report):
+                    raise SystemExit(1)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.report) as f:
+            if compare_reports(baseline, json.load(f)):
+                raise SystemExit(1)
@@ -0,0 +1,77 @@
+import datetime
+import random
+import numpy as np
+import pytest
+from PIL import Image
+from database_handler import DatabaseManager
+
+DAY_1 = datetime.date(2025, 3, 10)
+DAY_2 = datetime.date(2025, 3, 11)
+
+
+def at(day, hour, minute=0):
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "employees.db"))
+    embedding = np.random.default_rng(0).standard_normal(512).astype(np.float32)
+    db.save_employee("E1", "Test", embedding / np.linalg.norm(embedding), Image.new("RGB", (8, 8)))
+    return db
+
+
+def hours_by_day(db):
+    return {summary['day']: summary['seconds_on_site'] / 3600 for summary in db.get_daily_summaries(DAY_1, DAY_2)}
+
+
+def summary_table(db):
+    with db.get_connection() as conn:
+        return [tuple(row) for row in conn.execute("SELECT * FROM attendance_daily ORDER BY employee_id, day")]
+
+
+def test_stay_across_midnight_is_split(db):
+    db.log_entry(1, "Test", at(DAY_1, 22))
+    db.log_exit(1, "Test", at(DAY_2, 2))
+
+    assert hours_by_day(db) == {str(DAY_1): pytest.approx(2.0), str(DAY_2): pytest.approx(2.0)}
+
+
+def test_out_of_order_entry_refreshes_next_day(db):
+    db.log_exit(1, "Test", at(DAY_2, 2))
+    assert hours_by_day(db) == {str(DAY_2): 0.0}
+
+    db.log_entry(1, "Test", at(DAY_1, 22))
+
+    assert hours_by_day(db) == {str(DAY_1): pytest.approx(2.0), str(DAY_2): pytest.approx(2.0)}
+
+
+def test_log_deletion_refreshes_summaries(db):
+    db.log_entry(1, "Test", at(DAY_1, 22))
+    db.log_exit(1, "Test", at(DAY_2, 2))
+    with db.get_connection() as conn:
+        entry_id = conn.execute("SELECT id FROM entry_logs").fetchone()[0]
+
+    assert db.delete_entry_log(entry_id)
+
+    assert hours_by_day(db) == {str(DAY_2): 0.0}
+    assert db.get_employee_details("E1")['entry_count'] == 0
+
+
+def test_incremental_refresh_matches_rebuild(db):
+    rng = random.Random(0)
+    events = [
+        (rng.choice(["entry", "exit"]), at(DAY_1, 0) + datetime.timedelta(minutes=rng.randrange(3 * 24 * 60)))
+        for _ in range(60)
+    ]
+    rng.shuffle(events)  # Logged out of order, as with manual corrections
+    for event_type, event_time in events:
+        (db.log_entry if event_type == "entry" else db.log_exit)(1, "Test", event_time)
+    with db.get_connection() as conn:
+        exit_id = conn.execute("SELECT MIN(id) FROM exit_logs").fetchone()[0]
+    db.delete_exit_log(exit_id)
+
+    incremental = summary_table(db)
+    db.rebuild_daily_summaries()
+
+    assert summary_table(db) == incremental
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from PIL import Image
+from database_handler import DatabaseManager
+from face_processor import FaceProcessor
+
+
+def test_repeated_uploads_build_finite_templates():
+    rng = np.random.default_rng(0)
+    photos = rng.standard_normal((3, 512)).astype(np.float32)
+    # 10 uploads of the same 3 photos, as when an admin re-selects the same files
+    embeddings = [photos[i % 3] for i in range(10)]
+
+    templates = FaceProcessor(app=object()).build_templates(embeddings, max_templates=5)
+
+    assert 1 <= len(templates) <= 3
+    for _, template in templates:
+        assert np.all(np.isfinite(template))
+        assert np.linalg.norm(template) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_save_employee_rejects_non_finite_templates(tmp_path):
+    db = DatabaseManager(str(tmp_path / "employees.db"))
+    embedding = np.ones(512, dtype=np.float32) / np.sqrt(512)
+    templates = [("front", np.full(512, np.nan, dtype=np.float32))]
+
+    with pytest.raises(ValueError):
+        db.save_employee("E1", "Test", embedding, Image.new("RGB", (8, 8)), templates=templates)
+    assert db.get_employee_data() == []